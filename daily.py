@@ -0,0 +1,285 @@
+# Daily / seeded puzzles.
+# build_puzzle(seed) deterministically generates a level in the LEVELS schema, solves it and
+# labels it with the same explore-based difficulty scoring as the level packs (difficulty.py).
+# A batch job packs many seeds into a fixed-record binary index; PuzzleIndex memory-maps it
+# so a stats server can fetch any seed's level, par and solution in O(1) without solving.
+#
+# Index layout (little endian):
+#   header  HEADER_SIZE bytes: magic, version, record size, first seed, record count
+#   records one RECORD_SIZE record per seed, seed N at HEADER_SIZE + (N - first) * RECORD_SIZE
+#           num_tubes u8 | num_colors u8 | optimal u8 | flags u8
+#             flags: bit 0 present, bits 1-2 index into DIFFICULTIES, bit 3+i AUTO_TAGS[i]
+#           tubes    MAX_TUBES * TUBE_CAPACITY u8, bottom to top, 0 = empty
+#           unlocks  MAX_TUBES u8 (moves until each tube unlocks)
+#           solution MAX_SOLUTION u8, each move packed as src << 4 | dst
+import os
+import sys
+import mmap
+import random
+import struct
+import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+from engine import TUBE_CAPACITY, Board, normalize_unlocks
+from solver import solve, explore, DEFAULT_MAX_STATES
+from difficulty import AUTO_TAGS, analyze_metrics
+
+INDEX_FILE = "watersort_daily.idx"
+MAGIC = b"WSDI"
+VERSION = 2
+
+MAX_TUBES = 12
+MAX_SOLUTION = 64
+MIN_COLORS = 3
+MAX_COLORS = 5
+EMPTY_TUBES = 2
+LOCK_CHANCE = 0.25
+MAX_ATTEMPTS = 50
+
+HEADER = struct.Struct("<4sHHqI")
+HEADER_SIZE = 32
+RECORD_HEAD = struct.Struct("<BBBB")
+RECORD_SIZE = RECORD_HEAD.size + MAX_TUBES * TUBE_CAPACITY + MAX_TUBES + MAX_SOLUTION
+FLAG_PRESENT = 1
+DIFFICULTIES = ("Easy", "Medium", "Hard")
+DIFFICULTY_SHIFT = 1
+TAG_SHIFT = 3
+
+
+# ==================== SEEDS ====================
+def daily_seed(day=None):
+    return (day or datetime.date.today()).toordinal()
+
+
+# ==================== GENERATION ====================
+def generate(seed):
+    """Return (tubes, unlocks, solution) for `seed`. Same seed, same board, on any machine."""
+    rng = random.Random(seed)
+    num_colors = rng.randint(MIN_COLORS, MAX_COLORS)
+    units = [c for c in range(1, num_colors + 1) for _ in range(TUBE_CAPACITY)]
+
+    for _ in range(MAX_ATTEMPTS):
+        rng.shuffle(units)
+        tubes = [units[i * TUBE_CAPACITY:(i + 1) * TUBE_CAPACITY] for i in range(num_colors)]
+        tubes += [[] for _ in range(EMPTY_TUBES)]
+        unlocks = {}
+        if rng.random() < LOCK_CHANCE:
+            unlocks[len(tubes) - 1] = rng.randint(2, 4)
+
+        solution = solve(tubes, unlocks)
+        # skip boards that are already sorted or too tangled to solve
+        if solution and len(solution) <= MAX_SOLUTION:
+            return tubes, unlocks, solution
+    raise RuntimeError(f"no solvable puzzle for seed {seed} after {MAX_ATTEMPTS} attempts")
+
+
+def build_puzzle(seed):
+    """Generate, solve and label the full puzzle for `seed` (for the index and display)."""
+    tubes, unlocks, solution = generate(seed)
+    difficulty, tags = label_puzzle(tubes, unlocks)
+    return make_puzzle(seed, tubes, unlocks, solution, difficulty, tags)
+
+
+def label_puzzle(tubes, unlocks):
+    """Difficulty and auto tags from a full explore, scored like any level pack.
+
+    This is most of the batch job's cost: 5-color boards have ~100k-130k reachable
+    states and take ~3s each (a 365-day build takes ~8 minutes on one core), which is
+    why the result is stored in the index rather than recomputed on lookup.
+    """
+    level = {"tubes": tubes, "unlock_after_moves": unlocks}
+    result = analyze_metrics(level, explore(tubes, unlocks, max_states=DEFAULT_MAX_STATES))
+    # a board too big to explore fully has no score; its sheer size makes it Hard
+    return result["difficulty"] or "Hard", result["tags"]
+
+
+def make_puzzle(seed, tubes, unlocks, solution, difficulty, tags):
+    level = {
+        "id": f"seed_{seed}",
+        "name": f"Seed #{seed}",
+        "difficulty": difficulty,
+        "par_moves": len(solution),
+        "tags": ["daily"] + list(tags),
+        "is_demo_level": False,
+        "unlock_after_moves": dict(unlocks),
+        "tubes": tubes,
+    }
+    return {"seed": seed, "level": level, "par": len(solution), "solution": list(solution)}
+
+
+# ==================== RECORDS ====================
+def pack_record(puzzle):
+    level = puzzle["level"]
+    tubes = level["tubes"]
+    if len(tubes) > MAX_TUBES or len(puzzle["solution"]) > MAX_SOLUTION:
+        raise ValueError(f"seed {puzzle['seed']} does not fit an index record")
+    colors = {c for tube in tubes for c in tube}
+    flags = FLAG_PRESENT | DIFFICULTIES.index(level["difficulty"]) << DIFFICULTY_SHIFT
+    for i, tag in enumerate(AUTO_TAGS):
+        if tag in level["tags"]:
+            flags |= 1 << (TAG_SHIFT + i)
+
+    buf = bytearray(RECORD_SIZE)
+    RECORD_HEAD.pack_into(buf, 0, len(tubes), len(colors), puzzle["par"], flags)
+    pos = RECORD_HEAD.size
+    for i, tube in enumerate(tubes):
+        buf[pos + i * TUBE_CAPACITY:pos + i * TUBE_CAPACITY + len(tube)] = bytes(tube)
+    pos += MAX_TUBES * TUBE_CAPACITY
+    for idx, n in normalize_unlocks(level["unlock_after_moves"]).items():
+        buf[pos + idx] = n
+    pos += MAX_TUBES
+    for i, (src, dst) in enumerate(puzzle["solution"]):
+        buf[pos + i] = src << 4 | dst
+    return bytes(buf)
+
+
+def unpack_record(seed, data):
+    num_tubes, _, optimal, flags = RECORD_HEAD.unpack_from(data, 0)
+    if not flags & FLAG_PRESENT:
+        return None
+    pos = RECORD_HEAD.size
+    tubes = []
+    for i in range(num_tubes):
+        slots = data[pos + i * TUBE_CAPACITY:pos + (i + 1) * TUBE_CAPACITY]
+        tubes.append([c for c in slots if c])
+    pos += MAX_TUBES * TUBE_CAPACITY
+    unlocks = {i: data[pos + i] for i in range(num_tubes) if data[pos + i]}
+    pos += MAX_TUBES
+    solution = [(b >> 4, b & 0x0F) for b in data[pos:pos + optimal]]
+    difficulty = DIFFICULTIES[flags >> DIFFICULTY_SHIFT & 0b11]
+    tags = [tag for i, tag in enumerate(AUTO_TAGS) if flags >> (TAG_SHIFT + i) & 1]
+    return make_puzzle(seed, tubes, unlocks, solution, difficulty, tags)
+
+
+# ==================== INDEX ====================
+def build_index(first_seed, count, path=INDEX_FILE, workers=None):
+    """Solve seeds first_seed .. first_seed + count - 1 in parallel and write the index."""
+    seeds = range(first_seed, first_seed + count)
+    if workers == 1:
+        puzzles = [build_puzzle(s) for s in seeds]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            puzzles = list(pool.map(build_puzzle, seeds, chunksize=8))
+
+    header = bytearray(HEADER_SIZE)
+    HEADER.pack_into(header, 0, MAGIC, VERSION, RECORD_SIZE, first_seed, count)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(header)
+        for puzzle in puzzles:
+            f.write(pack_record(puzzle))
+    os.replace(tmp, path)  # readers never see a half-written index
+
+
+def build_year(start=None, days=365, path=INDEX_FILE, workers=None):
+    # One record per calendar day: daily seeds are consecutive date ordinals
+    build_index(daily_seed(start), days, path, workers)
+
+
+class PuzzleIndex:
+    """Read-only, memory-mapped view of an index built by build_index()."""
+
+    def __init__(self, path=INDEX_FILE):
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, record_size, first_seed, count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION or record_size != RECORD_SIZE:
+            self.close()
+            raise ValueError(f"{path} is not a version {VERSION} puzzle index")
+        self.first_seed = first_seed
+        self.count = count
+
+    def __contains__(self, seed):
+        return self.first_seed <= seed < self.first_seed + self.count
+
+    def __len__(self):
+        return self.count
+
+    def lookup(self, seed):
+        """Return the puzzle dict for `seed`, or None if the index doesn't cover it."""
+        if seed not in self:
+            return None
+        offset = HEADER_SIZE + (seed - self.first_seed) * RECORD_SIZE
+        return unpack_record(seed, self._map[offset:offset + RECORD_SIZE])
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def get_puzzle(seed, index=None):
+    # Indexed seeds are O(1); anything else (e.g. a custom challenge link) is built on demand
+    puzzle = index.lookup(seed) if index is not None else None
+    return puzzle or build_puzzle(seed)
+
+
+def puzzle_of_the_day(index=None, day=None):
+    day = day or datetime.date.today()
+    puzzle = get_puzzle(daily_seed(day), index)
+    puzzle["level"]["name"] = f"Daily {day.isoformat()}"
+    return puzzle
+
+
+# ==================== VERIFY ====================
+def is_move_pair(move):
+    if not isinstance(move, (list, tuple)) or len(move) != 2:
+        return False
+    # bool is an int subclass, but True/False are not tube indexes
+    return all(type(i) is int for i in move)
+
+
+def verify_score(seed, moves, index=None):
+    """Replay a submitted move list for `seed` and check it against par.
+
+    Returns {"valid", "won", "moves", "par"}; `valid` is False as soon as one move
+    breaks the pour/lock rules or isn't a (src, dst) pair of tube indexes. Submissions
+    come from clients, so malformed input is reported, never raised. Seeds missing
+    from the index are only generated and solved, never labeled: the score check
+    doesn't need a difficulty, and any client can pick the seed.
+    """
+    puzzle = index.lookup(seed) if index is not None else None
+    if puzzle is not None:
+        level = puzzle["level"]
+        tubes, unlocks, par = level["tubes"], level["unlock_after_moves"], puzzle["par"]
+    else:
+        tubes, unlocks, solution = generate(seed)
+        par = len(solution)
+    board = Board(tubes, unlocks)
+    valid = isinstance(moves, (list, tuple))
+    for move in moves if valid else ():
+        if not is_move_pair(move) or not board.try_pour(*move):
+            valid = False
+            break
+    return {"valid": valid, "won": valid and board.won, "moves": board.moves, "par": par}
+
+
+# ==================== CLI ====================
+def main(argv):
+    cmd = argv[1] if len(argv) > 1 else "today"
+    if cmd == "build":
+        start = datetime.date.fromisoformat(argv[2]) if len(argv) > 2 else None
+        build_year(start)
+        with PuzzleIndex() as index:
+            print(f"wrote {INDEX_FILE}: {len(index)} puzzles from seed {index.first_seed}")
+    else:
+        day = datetime.date.fromisoformat(argv[2]) if len(argv) > 2 else None
+        index = PuzzleIndex() if os.path.exists(INDEX_FILE) else None
+        puzzle = puzzle_of_the_day(index, day)
+        level = puzzle["level"]
+        print(f"{level['name']}  |  {level['difficulty']}  |  Par {puzzle['par']}  |  seed {puzzle['seed']}")
+        for i, tube in enumerate(level["tubes"]):
+            lock = level["unlock_after_moves"].get(i)
+            print(f"  {i + 1}: {tube}" + (f"  (locked for {lock} moves)" if lock else ""))
+        print("  solution: " + " ".join(f"{s + 1}->{d + 1}" for s, d in puzzle["solution"]))
+        if index is not None:
+            index.close()
+
+
+if __name__ == "__main__":
+    main(sys.argv)
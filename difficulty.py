@@ -0,0 +1,191 @@
+# Automatic difficulty labeling for level packs.
+# Each level is explored with the solver, scored from its search metrics and given a
+# difficulty + tags. The raw search metrics are cached by level hash (and search budget)
+# so re-running over a big pack only solves the levels that actually changed; scores,
+# labels and tags are recomputed from them on every run.
+import sys
+import os
+import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+
+from engine import TUBE_CAPACITY, normalize_unlocks
+from solver import explore, DEFAULT_MAX_STATES
+
+CACHE_FILE = "watersort_difficulty_cache.json"
+METRICS_VERSION = 1
+
+# score thresholds: below EASY_MAX -> Easy, below MEDIUM_MAX -> Medium, else Hard
+EASY_MAX = 10.0
+MEDIUM_MAX = 20.0
+
+AUTO_TAGS = ("locked-tube", "unique-solution", "dead-ends", "long", "unsolvable")
+
+
+# ==================== CACHE ====================
+def level_hash(level, max_states=DEFAULT_MAX_STATES):
+    payload = {
+        "v": METRICS_VERSION,
+        "max_states": max_states,
+        "capacity": TUBE_CAPACITY,
+        "tubes": level["tubes"],
+        "unlocks": sorted(normalize_unlocks(level.get("unlock_after_moves")).items()),
+    }
+    blob = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()
+
+
+def load_cache(path=CACHE_FILE):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+def save_cache(cache, path=CACHE_FILE):
+    try:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(cache, f, indent=2, sort_keys=True)
+    except Exception:
+        pass
+
+
+# ==================== SCORING ====================
+def score_metrics(metrics):
+    # No score for unsolvable levels or searches cut off by the state budget
+    if metrics["truncated"] or not metrics["solvable"]:
+        return None
+    # Longer solutions with more choices per move are harder to see through.
+    # Dead ends punish wrong guesses, and a single optimal line leaves no slack.
+    dead_end_ratio = metrics["dead_ends"] / max(1, metrics["states"])
+    uniqueness = 1.0 / max(1, metrics["optimal_solutions"])
+    score = metrics["optimal_moves"] * metrics["branching_factor"] / 4
+    score += 20 * dead_end_ratio + 4 * uniqueness
+    return round(score, 2)
+
+
+def difficulty_for_score(score):
+    # None means "can't tell": callers keep whatever label the level already has
+    if score is None:
+        return None
+    if score < EASY_MAX:
+        return "Easy"
+    if score < MEDIUM_MAX:
+        return "Medium"
+    return "Hard"
+
+
+def tags_for(level, metrics):
+    tags = []
+    if normalize_unlocks(level.get("unlock_after_moves")):
+        tags.append("locked-tube")
+    if metrics["truncated"]:
+        return tags
+    if not metrics["solvable"]:
+        tags.append("unsolvable")
+        return tags
+    if metrics["optimal_solutions"] == 1:
+        tags.append("unique-solution")
+    if metrics["dead_ends"] > 0:
+        tags.append("dead-ends")
+    if metrics["optimal_moves"] >= 20:
+        tags.append("long")
+    return tags
+
+
+# ==================== ANALYSIS ====================
+def analyze_metrics(level, metrics):
+    score = score_metrics(metrics)
+    return {
+        "metrics": metrics,
+        "score": score,
+        "difficulty": difficulty_for_score(score),
+        "tags": tags_for(level, metrics),
+    }
+
+
+def analyze_level(level, max_states=DEFAULT_MAX_STATES):
+    metrics = explore(level["tubes"], level.get("unlock_after_moves"), max_states=max_states)
+    return analyze_metrics(level, metrics)
+
+
+def _explore_worker(args):
+    level, max_states = args
+    return explore(level["tubes"], level.get("unlock_after_moves"), max_states=max_states)
+
+
+def analyze_pack(levels, workers=None, cache_path=CACHE_FILE, max_states=DEFAULT_MAX_STATES):
+    """Analyze every level, solving uncached ones in parallel. Returns {level_id: analysis}."""
+    cache = load_cache(cache_path) if cache_path else {}
+    hashes = [level_hash(lv, max_states) for lv in levels]
+
+    todo = []
+    seen = set()
+    for lv, h in zip(levels, hashes):
+        if h not in cache and h not in seen:
+            seen.add(h)
+            todo.append((lv, h))
+
+    metrics = {}
+    if todo:
+        jobs = [(lv, max_states) for lv, _ in todo]
+        if workers == 1 or len(jobs) == 1:
+            results = [_explore_worker(job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(_explore_worker, jobs))
+        for (_, h), result in zip(todo, results):
+            metrics[h] = result
+            # a cut-off search says nothing reliable, so never reuse it
+            if not result["truncated"]:
+                cache[h] = result
+        if cache_path:
+            save_cache(cache, cache_path)
+
+    return {
+        lv["id"]: analyze_metrics(lv, metrics[h] if h in metrics else cache[h])
+        for lv, h in zip(levels, hashes)
+    }
+
+
+def label_levels(levels, **kwargs):
+    """Return copies of `levels` with `difficulty` and `tags` filled in from analysis.
+
+    Hand-written tags are kept; automatic tags are recomputed each time. Levels that
+    are unsolvable or too big to search fully keep their hand-written difficulty.
+    """
+    analysis = analyze_pack(levels, **kwargs)
+    labeled = []
+    for lv in levels:
+        result = analysis[lv["id"]]
+        manual = [t for t in lv.get("tags", []) if t not in AUTO_TAGS]
+        new_lv = dict(lv)
+        if result["difficulty"] is not None:
+            new_lv["difficulty"] = result["difficulty"]
+        new_lv["tags"] = manual + [t for t in result["tags"] if t not in manual]
+        labeled.append(new_lv)
+    return labeled
+
+
+# ==================== CLI ====================
+def main(argv):
+    from levels import LEVELS
+
+    workers = int(argv[1]) if len(argv) > 1 else None
+    analysis = analyze_pack(LEVELS, workers=workers)
+    print(f"{'id':<10} {'label':<8} {'auto':<10} {'score':>6} {'opt':>4} {'branch':>6} {'dead':>5} {'#opt':>5}  tags")
+    for lv in LEVELS:
+        r = analysis[lv["id"]]
+        m = r["metrics"]
+        print(
+            f"{lv['id']:<10} {lv['difficulty']:<8} {str(r['difficulty'] or '?'):<10} {str(r['score']):>6} "
+            f"{str(m['optimal_moves']):>4} {m['branching_factor']:>6} {str(m['dead_ends']):>5} "
+            f"{str(m['optimal_solutions']):>5}  {', '.join(r['tags']) or '-'}"
+        )
+
+
+if __name__ == "__main__":
+    main(sys.argv)
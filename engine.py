@@ -0,0 +1,129 @@
+# Headless puzzle rules shared by the pygame UI and offline tools.
+# Nothing in here imports pygame, so solvers/analyzers can run without a display.
+
+TUBE_CAPACITY = 4
+
+
+# ==================== HELPERS ====================
+def clone_tubes(tubes):
+    return [tube[:] for tube in tubes]
+
+
+def is_tube_complete(tube):
+    if len(tube) != TUBE_CAPACITY:
+        return False
+    return all(c == tube[0] for c in tube)
+
+
+def check_win(tubes):
+    for tube in tubes:
+        if len(tube) == 0:
+            continue
+        if not is_tube_complete(tube):
+            return False
+    return True
+
+
+def top_color_and_count(tube):
+    if not tube:
+        return None, 0
+    color = tube[-1]
+    count = 0
+    for i in range(len(tube) - 1, -1, -1):
+        if tube[i] == color:
+            count += 1
+        else:
+            break
+    return color, count
+
+
+def can_pour(src, dst):
+    if not src:
+        return False
+    if len(dst) >= TUBE_CAPACITY:
+        return False
+    src_color, _ = top_color_and_count(src)
+    if not dst:
+        return True
+    return dst[-1] == src_color
+
+
+def pour(src, dst):
+    if not can_pour(src, dst):
+        return 0
+    _, src_count = top_color_and_count(src)
+    space = TUBE_CAPACITY - len(dst)
+    move_count = min(src_count, space)
+    for _ in range(move_count):
+        dst.append(src.pop())
+    return move_count
+
+
+# ==================== LOCKS ====================
+def normalize_unlocks(unlock_after_moves):
+    # JSON round-trips turn tube indices into strings; keep them as ints
+    return {int(idx): int(n) for idx, n in (unlock_after_moves or {}).items()}
+
+
+def lock_horizon(unlock_after_moves):
+    # After this many successful moves every tube is unlocked
+    return max(unlock_after_moves.values(), default=0)
+
+
+def is_locked_at(unlock_after_moves, tube_idx, moves_made):
+    return unlock_after_moves.get(tube_idx, 0) > moves_made
+
+
+# ==================== BOARD ====================
+class Board:
+    """Authoritative single-player board without any UI, timing or stats.
+
+    The one implementation of the move rules: the pygame Game, the race server and the
+    bot env all play through it. Locked tubes can't be poured from or into, and every
+    successful pour counts towards unlocking them.
+    """
+
+    def __init__(self, tubes, unlock_after_moves=None):
+        self.initial_state = clone_tubes(tubes)
+        self.unlock_after_moves = normalize_unlocks(unlock_after_moves)
+        self.reset()
+
+    def reset(self):
+        self.tubes = clone_tubes(self.initial_state)
+        self.moves = 0
+        self.won = check_win(self.tubes)
+        self.history = []
+
+    def is_locked(self, tube_idx):
+        return is_locked_at(self.unlock_after_moves, tube_idx, self.moves)
+
+    def remaining_lock_moves(self, tube_idx):
+        return max(0, self.unlock_after_moves.get(tube_idx, 0) - self.moves)
+
+    def is_valid_move(self, src, dst):
+        n = len(self.tubes)
+        if not (0 <= src < n and 0 <= dst < n) or src == dst:
+            return False
+        if self.won or self.is_locked(src) or self.is_locked(dst):
+            return False
+        return can_pour(self.tubes[src], self.tubes[dst])
+
+    def try_pour(self, src, dst):
+        # Returns the number of units moved, 0 if the move was rejected
+        if not self.is_valid_move(src, dst):
+            return 0
+        moved = pour(self.tubes[src], self.tubes[dst])
+        self.history.append((src, dst, moved))
+        self.moves += 1
+        self.won = check_win(self.tubes)
+        return moved
+
+    def undo(self):
+        if not self.history:
+            return False
+        src, dst, moved = self.history.pop()
+        for _ in range(moved):
+            self.tubes[src].append(self.tubes[dst].pop())
+        self.moves -= 1
+        self.won = False
+        return True
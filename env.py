@@ -0,0 +1,263 @@
+# Gym-style environments for bots and self-play, built on the engine rules.
+#
+# Observations are int8 arrays of shape (num_tubes, TUBE_CAPACITY), bottom to top, with 0
+# for an empty slot (colors in LEVELS start at 1). Actions are (src, dst) tube pairs; an
+# invalid action is a no-op that costs REWARD_INVALID, exactly like a rejected click.
+import sys
+import time
+
+import numpy as np
+
+from levels import LEVELS
+from engine import TUBE_CAPACITY, Board, normalize_unlocks
+
+REWARD_WIN = 1.0
+REWARD_STEP = -0.01
+REWARD_INVALID = -0.1
+
+LEVELS_BY_ID = {lv["id"]: lv for lv in LEVELS}
+
+
+def level_arrays(level):
+    """Return (grid, heights, unlocks) numpy arrays for a level's starting position."""
+    tubes = level["tubes"]
+    grid = np.zeros((len(tubes), TUBE_CAPACITY), dtype=np.int8)
+    heights = np.zeros(len(tubes), dtype=np.int8)
+    for i, tube in enumerate(tubes):
+        grid[i, :len(tube)] = tube
+        heights[i] = len(tube)
+    unlocks = np.zeros(len(tubes), dtype=np.int32)
+    for idx, n in normalize_unlocks(level.get("unlock_after_moves")).items():
+        unlocks[idx] = n
+    return grid, heights, unlocks
+
+
+# ==================== SINGLE ENV ====================
+class WaterSortEnv:
+    """One board, stepped through engine.Board. Handy for debugging bots and replays."""
+
+    def __init__(self, level_id=None):
+        self.board = None
+        self.level_id = None
+        self.reset(level_id or LEVELS[0]["id"])
+
+    def reset(self, level_id=None):
+        if level_id is not None and level_id != self.level_id:
+            level = LEVELS_BY_ID[level_id]
+            self.board = Board(level["tubes"], level.get("unlock_after_moves"))
+            self.level_id = level_id
+        else:
+            self.board.reset()
+        return self.observation()
+
+    @property
+    def num_tubes(self):
+        return len(self.board.tubes)
+
+    def observation(self):
+        obs = np.zeros((self.num_tubes, TUBE_CAPACITY), dtype=np.int8)
+        for i, tube in enumerate(self.board.tubes):
+            obs[i, :len(tube)] = tube
+        return obs
+
+    def legal_mask(self):
+        n = self.num_tubes
+        mask = np.zeros((n, n), dtype=bool)
+        for src in range(n):
+            for dst in range(n):
+                mask[src, dst] = self.board.is_valid_move(src, dst)
+        return mask
+
+    def step(self, src, dst):
+        moved = self.board.try_pour(src, dst)
+        if not moved:
+            reward = REWARD_INVALID
+        elif self.board.won:
+            reward = REWARD_WIN
+        else:
+            reward = REWARD_STEP
+        info = {"moved": moved, "moves": self.board.moves}
+        return self.observation(), reward, self.board.won, info
+
+
+# ==================== VECTOR ENV ====================
+class VecWaterSortEnv:
+    """Many copies of one level stepped together with numpy.
+
+    All state lives in preallocated arrays, so a step is a fixed handful of array ops no
+    matter how many envs there are. `step` returns views of internal buffers: copy them
+    if you need to keep an observation around. Finished envs are reset on the same step
+    that wins them (the returned `dones` flags which ones).
+    """
+
+    def __init__(self, num_envs, level_id=None):
+        self.num_envs = num_envs
+        self.level_id = None
+        self.reset(level_id or LEVELS[0]["id"])
+
+    def reset(self, level_id=None):
+        if level_id is not None and level_id != self.level_id:
+            self._load(level_id)
+        self.grid[:] = self.start_grid
+        self.heights[:] = self.start_heights
+        self.moves[:] = 0
+        return self.grid
+
+    def _load(self, level_id):
+        n = self.num_envs
+        self.level_id = level_id
+        self.start_grid, self.start_heights, self.unlocks = level_arrays(LEVELS_BY_ID[level_id])
+        self.num_tubes = t = len(self.start_heights)
+
+        self.grid = np.empty((n, t, TUBE_CAPACITY), dtype=np.int8)
+        self.heights = np.empty((n, t), dtype=np.int8)
+        self.moves = np.zeros(n, dtype=np.int32)
+        self.rewards = np.zeros(n, dtype=np.float32)
+        self.dones = np.zeros(n, dtype=bool)
+        self._rows = np.arange(n)
+        self._slots = np.arange(TUBE_CAPACITY, dtype=np.int8)
+
+    def locked(self):
+        return self.unlocks[None, :] > self.moves[:, None]
+
+    def legal_mask(self):
+        """Bool array (num_envs, num_tubes, num_tubes): mask[e, src, dst]."""
+        h = self.heights
+        top_idx = np.maximum(h - 1, 0).astype(np.intp)
+        top = np.take_along_axis(self.grid, top_idx[..., None], axis=2)[..., 0]
+        free = ~self.locked()
+        src_ok = (h > 0) & free
+        dst_ok = (h < TUBE_CAPACITY) & free
+        match = (h[:, None, :] == 0) | (top[:, :, None] == top[:, None, :])
+        mask = src_ok[:, :, None] & dst_ok[:, None, :] & match
+        mask[:, np.arange(self.num_tubes), np.arange(self.num_tubes)] = False
+        return mask
+
+    def step(self, src, dst):
+        """Pour src[e] -> dst[e] in every env e. Returns (obs, rewards, dones, moved)."""
+        rows = self._rows
+        t = self.num_tubes
+        src = np.asarray(src, dtype=np.intp)
+        dst = np.asarray(dst, dtype=np.intp)
+        # out-of-range tubes are invalid like any other bad pour; clip so the gathers
+        # below stay in bounds (numpy would wrap negatives or raise on large indexes)
+        in_range = (src >= 0) & (src < t) & (dst >= 0) & (dst < t)
+        src = np.clip(src, 0, t - 1)
+        dst = np.clip(dst, 0, t - 1)
+        grid, heights = self.grid, self.heights
+
+        hs = heights[rows, src]
+        hd = heights[rows, dst]
+        src_tube = grid[rows, src]                       # (n, capacity)
+        top = src_tube[rows, np.maximum(hs - 1, 0)]
+        dst_top = grid[rows, dst, np.maximum(hd - 1, 0)]
+
+        unlock_src = self.unlocks[src] <= self.moves
+        unlock_dst = self.unlocks[dst] <= self.moves
+        valid = in_range & (src != dst) & (hs > 0) & (hd < TUBE_CAPACITY) & unlock_src & unlock_dst
+        valid &= (hd == 0) | (dst_top == top)
+
+        # Length of the top run: distance from the top to the highest differing slot
+        filled = self._slots[None, :] < hs[:, None]
+        differs = filled & (src_tube != top[:, None])
+        last_diff = np.where(differs, self._slots[None, :], -1).max(axis=1)
+        run = hs - 1 - last_diff
+        moved = np.where(valid, np.minimum(run, TUBE_CAPACITY - hd), 0).astype(np.int8)
+
+        for j in range(TUBE_CAPACITY):
+            active = moved > j
+            if not active.any():
+                break
+            r = rows[active]
+            grid[r, dst[active], hd[active] + j] = top[active]
+            grid[r, src[active], hs[active] - 1 - j] = 0
+        heights[rows, src] = hs - moved
+        heights[rows, dst] = hd + moved
+        self.moves += valid
+
+        # Solved: every tube is empty or full of a single color
+        uniform = (grid == grid[:, :, :1]).all(axis=2)
+        tube_ok = (heights == 0) | ((heights == TUBE_CAPACITY) & uniform)
+        np.logical_and.reduce(tube_ok, axis=1, out=self.dones)
+
+        rewards = self.rewards
+        rewards.fill(REWARD_STEP)
+        rewards[~valid] = REWARD_INVALID
+        rewards[self.dones] = REWARD_WIN
+
+        if self.dones.any():
+            d = self.dones
+            grid[d] = self.start_grid
+            heights[d] = self.start_heights
+            self.moves[d] = 0
+        return grid, rewards, self.dones, moved
+
+
+# ==================== BENCH ====================
+def bench(num_envs=8192, steps=200, level_id="lv_05"):
+    env = VecWaterSortEnv(num_envs, level_id)
+    rng = np.random.default_rng(0)
+    t = env.num_tubes
+    # Pre-draw actions so the timing covers the env only
+    actions = rng.integers(0, t, size=(steps, 2, num_envs))
+    started = time.perf_counter()
+    for k in range(steps):
+        env.step(actions[k, 0], actions[k, 1])
+    elapsed = time.perf_counter() - started
+    print(f"{num_envs} envs x {steps} steps: {num_envs * steps / elapsed:,.0f} steps/s")
+
+
+# ==================== SELF-CHECK ====================
+def self_check(num_envs=64, steps=300, seed=0):
+    """Play VecWaterSortEnv and per-env WaterSortEnv (engine.Board) side by side.
+
+    A quarter of the envs replay the optimal solution over and over (covering wins and
+    auto-reset); the rest take mostly legal, sometimes random actions, including tube
+    indexes below 0 and past the last tube. Legal masks, moved counts, rewards, dones,
+    observations and move counts must agree at every step. Run after touching either
+    implementation of the rules.
+    """
+    from solver import solve
+
+    rng = np.random.default_rng(seed)
+    solvers = num_envs // 4
+    for level in LEVELS:
+        lid = level["id"]
+        path = solve(level["tubes"], level.get("unlock_after_moves"))
+        vec = VecWaterSortEnv(num_envs, lid)
+        singles = [WaterSortEnv(lid) for _ in range(num_envs)]
+        t = vec.num_tubes
+        wins = 0
+        for step in range(steps):
+            mask = vec.legal_mask()
+            src = rng.integers(-2, t + 2, num_envs)
+            dst = rng.integers(-2, t + 2, num_envs)
+            for e, env in enumerate(singles):
+                if not np.array_equal(mask[e], env.legal_mask()):
+                    raise AssertionError(f"{lid} step {step} env {e}: legal masks differ")
+                legal = np.argwhere(mask[e])
+                if e < solvers:
+                    src[e], dst[e] = path[step % len(path)]
+                elif len(legal) and rng.random() < 0.8:
+                    src[e], dst[e] = legal[rng.integers(len(legal))]
+
+            obs, rewards, dones, moved = vec.step(src, dst)
+            for e, env in enumerate(singles):
+                _, reward, done, info = env.step(int(src[e]), int(dst[e]))
+                if done:
+                    wins += 1
+                    env.reset()
+                if (info["moved"] != moved[e] or abs(reward - rewards[e]) > 1e-6 or done != dones[e]
+                        or env.board.moves != vec.moves[e]
+                        or not np.array_equal(env.observation(), obs[e])):
+                    raise AssertionError(f"{lid} step {step} env {e}: {src[e]}->{dst[e]} diverged")
+        if solvers and not wins:
+            raise AssertionError(f"{lid}: no env won, win/reset path not exercised")
+    print(f"self-check ok: {len(LEVELS)} levels x {num_envs} envs x {steps} steps")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "check":
+        self_check()
+    else:
+        bench(*(int(a) for a in sys.argv[1:3]))
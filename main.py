@@ -1,15 +1,24 @@
 import sys
 import os
 import json
+import math
+import time
+from collections import deque
 import pygame
 from levels import LEVELS
+from engine import (
+    TUBE_CAPACITY,
+    Board,
+    is_tube_complete,
+    can_pour,
+)
+from solver import SolveTask, SolutionCache
 
 pygame.init()
 
 # ==================== CONFIG ====================
 WIDTH, HEIGHT = 1080, 760
 FPS = 60
-TUBE_CAPACITY = 4
 STATS_FILE = "watersort_stats.json"
 
 BG_COLOR = (16, 22, 32)
@@ -81,64 +90,6 @@ def ensure_level_stats(stats, level_id):
 
 
 # ==================== HELPERS ====================
-def clone_tubes(tubes):
-    return [tube[:] for tube in tubes]
-
-
-def clone_locks(locks):
-    return dict(locks)
-
-
-def is_tube_complete(tube):
-    if len(tube) != TUBE_CAPACITY:
-        return False
-    return all(c == tube[0] for c in tube)
-
-
-def check_win(tubes):
-    for tube in tubes:
-        if len(tube) == 0:
-            continue
-        if not is_tube_complete(tube):
-            return False
-    return True
-
-
-def top_color_and_count(tube):
-    if not tube:
-        return None, 0
-    color = tube[-1]
-    count = 0
-    for i in range(len(tube) - 1, -1, -1):
-        if tube[i] == color:
-            count += 1
-        else:
-            break
-    return color, count
-
-
-def can_pour(src, dst):
-    if not src:
-        return False
-    if len(dst) >= TUBE_CAPACITY:
-        return False
-    src_color, _ = top_color_and_count(src)
-    if not dst:
-        return True
-    return dst[-1] == src_color
-
-
-def pour(src, dst):
-    if not can_pour(src, dst):
-        return 0
-    _, src_count = top_color_and_count(src)
-    space = TUBE_CAPACITY - len(dst)
-    move_count = min(src_count, space)
-    for _ in range(move_count):
-        dst.append(src.pop())
-    return move_count
-
-
 def compute_stars(moves, par_moves, hints_used=False):
     # Simple judge-friendly star system
     penalty = 2 if hints_used else 0
@@ -155,6 +106,10 @@ def star_string(n):
 
 
 # ==================== LAYOUT ====================
+TUBE_PADDING = 8
+SLOT_GAP = 5
+
+
 def get_tube_rects(num_tubes):
     rects = []
     cols = min(6, num_tubes)
@@ -177,6 +132,18 @@ def get_tube_rects(num_tubes):
     return rects
 
 
+def tube_inner_rect(rect):
+    return rect.inflate(-TUBE_PADDING * 2, -TUBE_PADDING * 2)
+
+
+def tube_slot_rect(rect, level):
+    # Liquid slot `level` (0 = bottom) of the tube drawn in `rect`
+    inner = tube_inner_rect(rect)
+    slot_h = (inner.height - (TUBE_CAPACITY + 1) * SLOT_GAP) // TUBE_CAPACITY
+    y = inner.bottom - SLOT_GAP - (level + 1) * slot_h - level * SLOT_GAP
+    return pygame.Rect(inner.x + 5, y, inner.width - 10, slot_h)
+
+
 def tube_at_pos(pos, tube_rects):
     for i, rect in enumerate(tube_rects):
         if rect.collidepoint(pos):
@@ -239,42 +206,48 @@ def draw_lock_badge(rect, remaining_moves):
         draw_text(str(remaining_moves), rect.centerx, rect.y - 14, font=SMALL_FONT, color=WARN_AMBER, center=True)
 
 
-def draw_tube(rect, tube, selected=False, tick=0, locked=False, remaining_lock_moves=0):
+def draw_tube(rect, tube, selected=False, t=0.0, locked=False, remaining_lock_moves=0, top_fill=1.0, surface=None):
+    # t is the animation clock in seconds; top_fill < 1 draws the top layer partly poured
+    surface = surface or screen
     glass_outer = (235, 243, 255)
     glass_inner = (20, 26, 36)
     glow_color = SELECT_COLOR if not locked else (180, 120, 120)
 
     if selected:
         glow_rect = rect.inflate(14, 14)
-        pygame.draw.rect(screen, glow_color, glow_rect, 4, border_radius=18)
+        pygame.draw.rect(surface, glow_color, glow_rect, 4, border_radius=18)
 
     border_color = (150, 160, 175) if locked else glass_outer
-    pygame.draw.rect(screen, border_color, rect, 3, border_radius=15)
+    pygame.draw.rect(surface, border_color, rect, 3, border_radius=15)
 
-    padding = 8
-    inner = rect.inflate(-padding * 2, -padding * 2)
+    inner = tube_inner_rect(rect)
     inner_fill = (28, 30, 34) if locked else glass_inner
-    pygame.draw.rect(screen, inner_fill, inner, border_radius=12)
+    pygame.draw.rect(surface, inner_fill, inner, border_radius=12)
 
     # glass highlights
-    pygame.draw.rect(screen, (210, 235, 255), pygame.Rect(inner.x + 4, inner.y + 8, 4, inner.height - 16), border_radius=3)
-    pygame.draw.rect(screen, (105, 145, 185), pygame.Rect(inner.right - 8, inner.y + 14, 2, inner.height - 28), border_radius=2)
+    pygame.draw.rect(surface, (210, 235, 255), pygame.Rect(inner.x + 4, inner.y + 8, 4, inner.height - 16), border_radius=3)
+    pygame.draw.rect(surface, (105, 145, 185), pygame.Rect(inner.right - 8, inner.y + 14, 2, inner.height - 28), border_radius=2)
+
+    slot_h = tube_slot_rect(rect, 0).height
 
-    slot_gap = 5
-    slot_h = (inner.height - (TUBE_CAPACITY + 1) * slot_gap) // TUBE_CAPACITY
-    slot_w = inner.width - 10
-    slot_x = inner.x + 5
+    def liquid_rect(level):
+        slot_rect = tube_slot_rect(rect, level)
+        if level == len(tube) - 1 and top_fill < 1.0:
+            h = max(2, int(slot_h * top_fill))
+            slot_rect = pygame.Rect(slot_rect.x, slot_rect.bottom - h, slot_rect.width, h)
+        return slot_rect
 
     # empty slots
     for level in range(TUBE_CAPACITY):
-        y = inner.bottom - slot_gap - (level + 1) * slot_h - level * slot_gap
-        slot_rect = pygame.Rect(slot_x, y, slot_w, slot_h)
-        pygame.draw.rect(screen, EMPTY_SLOT if not locked else (70, 72, 78), slot_rect, border_radius=8)
+        slot_rect = tube_slot_rect(rect, level)
+        pygame.draw.rect(surface, EMPTY_SLOT if not locked else (70, 72, 78), slot_rect, border_radius=8)
+
+    # bubbles drift at a fixed rate per second, independent of FPS
+    bubble_step = int(t * 7.5)
 
     # liquid
     for level in range(len(tube)):
-        y = inner.bottom - slot_gap - (level + 1) * slot_h - level * slot_gap
-        slot_rect = pygame.Rect(slot_x, y, slot_w, slot_h)
+        slot_rect = liquid_rect(level)
         color_id = tube[level]
         base = COLOR_MAP.get(color_id, (200, 200, 200))
 
@@ -282,43 +255,191 @@ def draw_tube(rect, tube, selected=False, tick=0, locked=False, remaining_lock_m
             # dim colors when locked
             base = tuple(max(30, c - 60) for c in base)
 
-        pygame.draw.rect(screen, base, slot_rect, border_radius=8)
-        pygame.draw.rect(screen, (255, 255, 255), (slot_rect.x + 3, slot_rect.y + 3, slot_rect.width - 6, 5), border_radius=4)
-        pygame.draw.rect(screen, (20, 20, 20), (slot_rect.x + 2, slot_rect.bottom - 5, slot_rect.width - 4, 3), border_radius=2)
-        pygame.draw.rect(screen, (245, 245, 245), slot_rect, 1, border_radius=8)
+        pygame.draw.rect(surface, base, slot_rect, border_radius=8)
+        if slot_rect.height < slot_h:
+            # partially poured layer: no gloss or bubbles
+            continue
+        pygame.draw.rect(surface, (255, 255, 255), (slot_rect.x + 3, slot_rect.y + 3, slot_rect.width - 6, 5), border_radius=4)
+        pygame.draw.rect(surface, (20, 20, 20), (slot_rect.x + 2, slot_rect.bottom - 5, slot_rect.width - 4, 3), border_radius=2)
+        pygame.draw.rect(surface, (245, 245, 245), slot_rect, 1, border_radius=8)
 
         # bubbles
-        phase = (tick // 8 + level * 7 + color_id * 3) % 12
+        phase = (bubble_step + level * 7 + color_id * 3) % 12
         bubble_y_offset = phase - 6
         b1 = (slot_rect.x + 11, slot_rect.centery + bubble_y_offset // 2)
         b2 = (slot_rect.right - 13, slot_rect.centery - 5 - bubble_y_offset // 3)
         b3 = (slot_rect.centerx + 6, slot_rect.bottom - 10 - (phase // 2))
-        pygame.draw.circle(screen, (255, 255, 255), b1, 2)
-        pygame.draw.circle(screen, (235, 245, 255), b2, 1)
-        pygame.draw.circle(screen, (250, 250, 255), b3, 1)
+        pygame.draw.circle(surface, (255, 255, 255), b1, 2)
+        pygame.draw.circle(surface, (235, 245, 255), b2, 1)
+        pygame.draw.circle(surface, (250, 250, 255), b3, 1)
 
     # surface ellipse on top layer
     if len(tube) > 0:
-        top_level = len(tube) - 1
-        y = inner.bottom - slot_gap - (top_level + 1) * slot_h - top_level * slot_gap
-        top_rect = pygame.Rect(slot_x, y, slot_w, slot_h)
-        wave_shift = ((tick // 6) % 5) - 2
+        top_rect = liquid_rect(len(tube) - 1)
+        wave_shift = (int(t * 10) % 5) - 2
         surface_rect = pygame.Rect(top_rect.x + 4, top_rect.y + 2, top_rect.width - 8, 10)
         surface_rect.x += wave_shift
         edge_col = (235, 235, 235) if locked else (255, 255, 255)
-        pygame.draw.ellipse(screen, edge_col, surface_rect, 2)
+        pygame.draw.ellipse(surface, edge_col, surface_rect, 2)
         surface_inner = surface_rect.inflate(-4, -4)
         if surface_inner.width > 0 and surface_inner.height > 0:
-            pygame.draw.ellipse(screen, (220, 240, 255), surface_inner, 1)
+            pygame.draw.ellipse(surface, (220, 240, 255), surface_inner, 1)
 
     # tube lip
     lip = pygame.Rect(rect.x + 6, rect.y - 2, rect.width - 12, 8)
-    pygame.draw.rect(screen, (180, 220, 255), lip, border_radius=5)
+    pygame.draw.rect(surface, (180, 220, 255), lip, border_radius=5)
 
     if locked:
         draw_lock_badge(rect, remaining_lock_moves)
 
 
+# ==================== ANIMATION ====================
+POUR_LIFT_SEC = 0.18
+POUR_SEC_PER_UNIT = 0.14
+POUR_RETURN_SEC = 0.16
+POUR_TILT_DEG = 58
+MAX_FRAME_DT = 0.25  # a long stall skips ahead instead of fast-forwarding for seconds
+
+
+def ease(p):
+    p = max(0.0, min(1.0, p))
+    return p * p * (3 - 2 * p)
+
+
+def partial_column(base, color, amount):
+    # base plus `amount` (possibly fractional) units of color -> (contents, top_fill)
+    whole = math.ceil(amount - 1e-6)
+    if whole <= 0:
+        return base[:], 1.0
+    return base + [color] * whole, amount - (whole - 1)
+
+
+def liquid_top_y(rect, layers):
+    # y of the liquid surface with `layers` (possibly fractional) units in the tube
+    bottom_slot = tube_slot_rect(rect, 0)
+    return bottom_slot.bottom - layers * (bottom_slot.height + SLOT_GAP)
+
+
+class TubeView:
+    __slots__ = ("contents", "top_fill", "lifted_by", "lift", "transfer")
+
+    def __init__(self, contents, top_fill, lifted_by, lift, transfer):
+        self.contents = contents
+        self.top_fill = top_fill
+        self.lifted_by = lifted_by
+        self.lift = lift
+        self.transfer = transfer
+
+
+class PourAnimation:
+    """Lift + tilt the source tube over the destination, transfer liquid, then put it back.
+
+    Progress is driven by elapsed seconds, so the pour takes the same time at any FPS.
+    """
+
+    def __init__(self, src, dst, src_before, dst_before, moved):
+        self.src = src
+        self.dst = dst
+        self.src_base = src_before[:-moved]
+        self.dst_base = dst_before[:]
+        self.color = src_before[-1]
+        self.moved = moved
+        self.elapsed = 0.0
+        self.pour_start = POUR_LIFT_SEC
+        self.pour_end = self.pour_start + POUR_SEC_PER_UNIT * moved
+        self.duration = self.pour_end + POUR_RETURN_SEC
+
+    @property
+    def done(self):
+        return self.elapsed >= self.duration
+
+    def update(self, dt):
+        self.elapsed += dt
+
+    def progress(self):
+        # (lift, transfer): lift 0..1 = on the shelf..fully tilted, transfer 0..1 = liquid moved
+        e = self.elapsed
+        if e < self.pour_start:
+            return ease(e / self.pour_start), 0.0
+        if e < self.pour_end:
+            return 1.0, (e - self.pour_start) / (self.pour_end - self.pour_start)
+        return 1.0 - ease((e - self.pour_end) / POUR_RETURN_SEC), 1.0
+
+    def views(self):
+        lift, transfer = self.progress()
+        src_view = partial_column(self.src_base, self.color, self.moved * (1.0 - transfer))
+        dst_view = partial_column(self.dst_base, self.color, self.moved * transfer)
+        return {
+            self.src: TubeView(src_view[0], src_view[1], self, lift, transfer),
+            self.dst: TubeView(dst_view[0], dst_view[1], None, 0.0, transfer),
+        }
+
+    def pose(self, src_rect, dst_rect, lift):
+        # Centre + angle of the lifted source tube; at full lift its lip sits over dst
+        direction = 1 if dst_rect.centerx >= src_rect.centerx else -1
+        full_angle = -direction * POUR_TILT_DEG
+        lip_offset = pygame.math.Vector2(0, -src_rect.height / 2).rotate(-full_angle)
+        target = pygame.math.Vector2(dst_rect.centerx, dst_rect.y - 14) - lip_offset
+        home = pygame.math.Vector2(src_rect.center)
+        return home.lerp(target, lift), full_angle * lift
+
+
+class Animator:
+    """Time-based scheduler for running animations plus the input queued behind them.
+
+    Tube clicks wait in `pending_clicks` while anything is animating, so in practice only
+    one pour plays at a time; tube_views() relies on that and lets a later animation's
+    view of a tube replace an earlier one rather than merging them.
+    """
+
+    def __init__(self):
+        self.animations = []
+        self.pending_clicks = deque()
+
+    @property
+    def busy(self):
+        return bool(self.animations)
+
+    def start_pour(self, src, dst, src_before, dst_before, moved):
+        self.animations.append(PourAnimation(src, dst, src_before, dst_before, moved))
+
+    def update(self, dt):
+        for anim in self.animations:
+            anim.update(dt)
+        self.animations = [a for a in self.animations if not a.done]
+
+    def clear(self):
+        self.animations.clear()
+        self.pending_clicks.clear()
+
+    def tube_views(self):
+        # One pass over the running animations -> {tube index: TubeView} for this frame.
+        # Overlapping views are not merged (see class docstring): last one wins.
+        views = {}
+        for anim in self.animations:
+            views.update(anim.views())
+        return views
+
+
+def draw_lifted_tube(view, src_rect, dst_rect, t):
+    anim = view.lifted_by
+    center, angle = anim.pose(src_rect, dst_rect, view.lift)
+
+    pad = 20
+    surf = pygame.Surface((src_rect.width + pad * 2, src_rect.height + pad * 2), pygame.SRCALPHA)
+    draw_tube(pygame.Rect(pad, pad, src_rect.width, src_rect.height), view.contents, t=t,
+              top_fill=view.top_fill, surface=surf)
+    rotated = pygame.transform.rotate(surf, angle)
+    screen.blit(rotated, rotated.get_rect(center=(round(center.x), round(center.y))))
+
+    # liquid stream while the transfer is running
+    if view.lift >= 1.0 and 0.0 < view.transfer < 1.0:
+        lip = center + pygame.math.Vector2(0, -src_rect.height / 2).rotate(-angle)
+        layers = len(anim.dst_base) + anim.moved * view.transfer
+        end = (dst_rect.centerx, liquid_top_y(dst_rect, layers))
+        pygame.draw.line(screen, COLOR_MAP.get(anim.color, (200, 200, 200)), lip, end, 6)
+
+
 # ==================== GAME ====================
 class Game:
     def __init__(self):
@@ -333,6 +454,7 @@ class Game:
         self.hint_move = None
         self.hints_used_this_level = 0
         self.level_start_ticks = 0
+        self.last_pour = None  # (src, dst, src_before, dst_before, moved) for the animator
         self.load_level(self.level_index)
 
     def current_level(self):
@@ -345,33 +467,26 @@ class Game:
         self.level_index = index % len(LEVELS)
         meta = self.current_level()
 
-        self.initial_state = clone_tubes(meta["tubes"])
-        self.tubes = clone_tubes(meta["tubes"])
+        # board state and pour/lock rules live in the headless engine.Board
+        self.board = Board(meta["tubes"], meta.get("unlock_after_moves", {}))
         self.selected_tube = None
-        self.moves = 0
-        self.won = False
         self.history = []
         self.hint_move = None
         self.hints_used_this_level = 0
+        self.assisted = False  # auto-solve played at least one move this attempt
         self.level_start_ticks = pygame.time.get_ticks()
 
-        # lock configuration: tube index unlocks after N successful moves
-        self.unlock_after_moves = dict(meta.get("unlock_after_moves", {}))
-        self.lock_state = dict(self.unlock_after_moves)  # remaining moves until unlock
-
         ensure_level_stats(self.stats, meta["id"])
         save_stats(self.stats)
 
     def restart(self):
-        self.tubes = clone_tubes(self.initial_state)
+        self.board.reset()
         self.selected_tube = None
-        self.moves = 0
-        self.won = False
         self.history = []
         self.hint_move = None
         self.hints_used_this_level = 0
+        self.assisted = False
         self.level_start_ticks = pygame.time.get_ticks()
-        self.lock_state = dict(self.unlock_after_moves)
         self.stats["total_restarts"] += 1
         save_stats(self.stats)
 
@@ -403,46 +518,46 @@ class Game:
         if self.demo_only and self.level_index not in self.demo_indices:
             self.load_level(self.demo_indices[0])
 
+    @property
+    def tubes(self):
+        return self.board.tubes
+
+    @property
+    def moves(self):
+        return self.board.moves
+
+    @property
+    def won(self):
+        return self.board.won
+
+    @property
+    def unlock_after_moves(self):
+        return self.board.unlock_after_moves
+
     def is_locked(self, tube_idx):
-        return self.lock_state.get(tube_idx, 0) > 0
+        return self.board.is_locked(tube_idx)
 
     def remaining_lock_moves(self, tube_idx):
-        return self.lock_state.get(tube_idx, 0)
-
-    def decrement_locks_after_successful_move(self):
-        changed = False
-        for idx in list(self.lock_state.keys()):
-            if self.lock_state[idx] > 0:
-                self.lock_state[idx] -= 1
-                changed = True
-        if changed:
-            # cleanup unlocked entries
-            for idx in list(self.lock_state.keys()):
-                if self.lock_state[idx] <= 0:
-                    self.lock_state[idx] = 0
+        return self.board.remaining_lock_moves(tube_idx)
 
     def save_history(self):
+        # the board keeps its own pour history; this holds the UI-side state per move
         self.history.append((
-            clone_tubes(self.tubes),
-            self.moves,
-            self.won,
-            clone_locks(self.lock_state),
             self.hint_move,
             self.hints_used_this_level,
             self.level_start_ticks,
+            self.assisted,
         ))
 
     def undo(self):
         if not self.history:
             return
         prev = self.history.pop()
-        self.tubes = clone_tubes(prev[0])
-        self.moves = prev[1]
-        self.won = prev[2]
-        self.lock_state = clone_locks(prev[3])
-        self.hint_move = prev[4]
-        self.hints_used_this_level = prev[5]
-        self.level_start_ticks = prev[6]
+        self.board.undo()
+        self.hint_move = prev[0]
+        self.hints_used_this_level = prev[1]
+        self.level_start_ticks = prev[2]
+        self.assisted = prev[3]
         self.selected_tube = None
 
     def all_valid_moves(self):
@@ -475,7 +590,8 @@ class Game:
             save_stats(self.stats)
 
     def complete_level_if_needed(self):
-        if not self.won:
+        # auto-solved runs are a showcase, not a score
+        if not self.won or self.assisted:
             return
         meta = self.current_level()
         lid = meta["id"]
@@ -496,7 +612,7 @@ class Game:
 
         save_stats(self.stats)
 
-    def handle_tube_click(self, idx):
+    def handle_tube_click(self, idx, assisted=False):
         if self.won:
             return
 
@@ -515,29 +631,114 @@ class Game:
         src_idx = self.selected_tube
         dst_idx = idx
 
-        # locked destination blocks move
-        if self.is_locked(dst_idx) or self.is_locked(src_idx):
-            self.selected_tube = None
-            return
-
-        if can_pour(self.tubes[src_idx], self.tubes[dst_idx]):
+        # locked tubes, full destinations and color mismatches are rejected by the board
+        if self.board.is_valid_move(src_idx, dst_idx):
             self.save_history()
-            moved = pour(self.tubes[src_idx], self.tubes[dst_idx])
-            if moved > 0:
-                self.moves += 1
-                self.hint_move = None
-                self.decrement_locks_after_successful_move()
-                self.won = check_win(self.tubes)
-                if self.won:
-                    self.complete_level_if_needed()
+            if assisted:
+                self.assisted = True
+            src_before = self.tubes[src_idx][:]
+            dst_before = self.tubes[dst_idx][:]
+            moved = self.board.try_pour(src_idx, dst_idx)
+            self.last_pour = (src_idx, dst_idx, src_before, dst_before, moved)
+            self.hint_move = None
+            if self.won:
+                self.complete_level_if_needed()
 
         self.selected_tube = None
 
 
+# ==================== AUTO-SOLVE DEMO ====================
+AUTO_SOLVE_SLICE_SEC = 0.004  # search time per frame, keeps animations smooth
+AUTO_SOLVE_BATCH = 200        # states expanded between clock checks
+
+
+class AutoSolveDemo:
+    """Plays an optimal solution for the current board, one animated pour at a time.
+
+    The search runs in short slices each frame, so the UI keeps animating while it works.
+    Undo and restart leave the demo running: solved paths go into a per-level
+    SolutionCache, so after undoing back along the demo's moves (or restarting) it
+    resumes straight away without searching again.
+    """
+
+    def __init__(self):
+        self.active = False
+        self.caches = {}
+        self.task = None
+        self.status = ""
+
+    def cache_for(self, game):
+        lid = game.current_level()["id"]
+        if lid not in self.caches:
+            self.caches[lid] = SolutionCache(game.unlock_after_moves)
+        return self.caches[lid]
+
+    def toggle(self, game):
+        if self.active:
+            self.stop()
+        elif game.current_level().get("is_demo_level") and not game.won:
+            self.active = True
+            game.selected_tube = None
+
+    def stop(self):
+        self.active = False
+        self.task = None
+        self.status = ""
+
+    def update(self, game, animator):
+        if not self.active:
+            return
+        if game.won:
+            self.stop()
+            return
+
+        cache = self.cache_for(game)
+        state = cache.state_for(game.tubes, game.moves)
+        path = cache.get(state)
+        if path is None:
+            if self.task is None or self.task.start != state:
+                self.task = SolveTask(game.tubes, game.unlock_after_moves, game.moves)
+            deadline = time.perf_counter() + AUTO_SOLVE_SLICE_SEC
+            while not self.task.run(AUTO_SOLVE_BATCH):
+                if time.perf_counter() >= deadline:
+                    self.status = f"Auto-solve: searching... {self.task.states_seen:,} positions"
+                    return
+            task, self.task = self.task, None
+            found = task.path
+            if found is None:
+                self.active = False
+                if task.truncated:
+                    self.status = "Auto-solve: search budget exceeded"
+                else:
+                    self.status = "Auto-solve: no solution from this position"
+                return
+            cache.store(state, found)
+            path = found
+
+        self.status = f"Auto-solve: {len(path)} moves to go"
+        if animator.busy or not path:
+            return
+
+        src, dst = path[0]
+        game.selected_tube = None
+        game.handle_tube_click(src)
+        game.handle_tube_click(dst, assisted=True)
+        if game.last_pour is not None:
+            animator.start_pour(*game.last_pour)
+            game.last_pour = None
+
+
 # ==================== MAIN ====================
 def main():
     game = Game()
-    tick = 0
+    animator = Animator()
+    demo = AutoSolveDemo()
+    anim_time = 0.0
+
+    def interrupt():
+        # leaving the level (or its board) behind ends running animations and the demo
+        animator.clear()
+        demo.stop()
 
     # UI rects
     top_panel = pygame.Rect(18, 16, WIDTH - 36, 96)
@@ -551,8 +752,9 @@ def main():
     demo_btn    = pygame.Rect(620, 36, 134, 46)
 
     while True:
-        tick += 1
-        clock.tick(FPS)
+        dt = min(clock.tick(FPS) / 1000.0, MAX_FRAME_DT)
+        anim_time += dt
+        animator.update(dt)
         mouse_pos = pygame.mouse.get_pos()
         tube_rects = get_tube_rects(len(game.tubes))
         meta = game.current_level()
@@ -567,44 +769,66 @@ def main():
 
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_r:
+                    animator.clear()  # the demo, if running, carries on from the new position
                     game.restart()
                 elif event.key == pygame.K_u:
+                    animator.clear()  # the demo, if running, carries on from the new position
                     game.undo()
                 elif event.key == pygame.K_n:
+                    interrupt()
                     game.next_level()
                 elif event.key == pygame.K_b:
+                    interrupt()
                     game.prev_level()
                 elif event.key == pygame.K_h:
                     game.request_hint()
                 elif event.key == pygame.K_d:
+                    interrupt()
                     game.toggle_demo_mode()
+                elif event.key == pygame.K_a:
+                    demo.toggle(game)
                 elif event.key == pygame.K_ESCAPE:
                     pygame.quit()
                     sys.exit()
 
             if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                 if restart_btn.collidepoint(event.pos):
+                    animator.clear()  # the demo, if running, carries on from the new position
                     game.restart()
                     continue
                 if undo_btn.collidepoint(event.pos):
+                    animator.clear()  # the demo, if running, carries on from the new position
                     game.undo()
                     continue
                 if hint_btn.collidepoint(event.pos):
                     game.request_hint()
                     continue
                 if prev_btn.collidepoint(event.pos):
+                    interrupt()
                     game.prev_level()
                     continue
                 if next_btn.collidepoint(event.pos):
+                    interrupt()
                     game.next_level()
                     continue
                 if demo_btn.collidepoint(event.pos):
+                    interrupt()
                     game.toggle_demo_mode()
                     continue
 
                 idx = tube_at_pos(event.pos, tube_rects)
                 if idx is not None:
-                    game.handle_tube_click(idx)
+                    demo.stop()
+                    # clicks made mid-pour wait until the animation finishes
+                    animator.pending_clicks.append(idx)
+
+        while animator.pending_clicks and not animator.busy:
+            game.handle_tube_click(animator.pending_clicks.popleft())
+            if game.last_pour is not None:
+                animator.start_pour(*game.last_pour)
+                game.last_pour = None
+
+        demo.update(game, animator)
 
         # ---------- DRAW ----------
         screen.fill(BG_COLOR)
@@ -645,26 +869,35 @@ def main():
         draw_text(f"Wins: {wins}", 930, HEIGHT - 70, font=SMALL_FONT, color=SUBTEXT_COLOR)
         draw_text(f"Stars: {star_string(best_stars)}", 36, HEIGHT - 44, font=SMALL_FONT, color=WARN_AMBER)
 
-        controls_text = "Controls: Click pour | R restart | U undo | H hint | B prev | N next | D demo mode"
+        controls_text = "Controls: Click pour | R restart | U undo | H hint | B prev | N next | D demo mode | A auto-solve"
         draw_text(controls_text, WIDTH // 2, 128, font=SMALL_FONT, color=SUBTEXT_COLOR, center=True)
 
-        # Hint line
-        if game.hint_move is not None and not game.won:
+        # Hint / auto-solve line
+        if demo.status:
+            draw_text(demo.status, WIDTH // 2, 148, font=SMALL_FONT, color=WARN_AMBER, center=True)
+        elif game.hint_move is not None and not game.won:
             s, d = game.hint_move
             draw_text(f"Hint: Try pouring Tube {s + 1} -> Tube {d + 1}", WIDTH // 2, 148, font=SMALL_FONT, color=WARN_AMBER, center=True)
 
-        # Draw tubes
+        # Draw tubes (animated tubes show their in-between contents; lifted ones go on top)
+        views = animator.tube_views()
+        lifted = []
         for i, rect in enumerate(tube_rects):
             locked = game.is_locked(i)
             remaining = game.remaining_lock_moves(i)
-            draw_tube(
-                rect,
-                game.tubes[i],
-                selected=(i == game.selected_tube),
-                tick=tick,
-                locked=locked,
-                remaining_lock_moves=remaining
-            )
+            view = views.get(i)
+            if view is not None and view.lifted_by is not None:
+                lifted.append(view)
+            else:
+                draw_tube(
+                    rect,
+                    view.contents if view is not None else game.tubes[i],
+                    selected=(i == game.selected_tube),
+                    t=anim_time,
+                    locked=locked,
+                    remaining_lock_moves=remaining,
+                    top_fill=view.top_fill if view is not None else 1.0,
+                )
 
             # Tube index label
             label_color = WARN_AMBER if locked else SUBTEXT_COLOR
@@ -677,15 +910,21 @@ def main():
                     hint_rect = rect.inflate(6, 6)
                     pygame.draw.rect(screen, (255, 180, 60), hint_rect, 2, border_radius=16)
 
-        # Win banner
-        if game.won:
+        for view in lifted:
+            anim = view.lifted_by
+            draw_lifted_tube(view, tube_rects[anim.src], tube_rects[anim.dst], anim_time)
+
+        # Win banner (after the winning pour has finished animating)
+        if game.won and not animator.busy:
             stars = compute_stars(game.moves, par_moves, hints_used=(game.hints_used_this_level > 0))
             banner = pygame.Rect(WIDTH // 2 - 300, HEIGHT - 160, 600, 60)
             pygame.draw.rect(screen, WIN_GREEN, banner, border_radius=14)
             pygame.draw.rect(screen, (170, 255, 210), banner, 2, border_radius=14)
 
             msg = f"Level Complete!  {star_string(stars)}  •  {game.moves} moves • {elapsed}s"
-            if game.hints_used_this_level > 0:
+            if game.assisted:
+                msg += " • auto-solved"
+            elif game.hints_used_this_level > 0:
                 msg += " • hint penalty applied"
             draw_text(msg, banner.centerx, banner.centery, font=SMALL_FONT, color=(240, 255, 245), center=True)
 
@@ -0,0 +1,311 @@
+# Local race/spectator server.
+# The server owns one authoritative engine.Board per player per match; clients only send
+# pours and get compact deltas back. Protocol is newline-delimited JSON over TCP:
+#
+#   -> {"t": "join", "match": "m1", "level": "demo_01", "name": "alice"}
+#   <- {"t": "state", "match": "m1", "level": "demo_01", "you": 0,
+#       "tubes": [...], "locks": {...}, "players": {...}}
+#   -> {"t": "spectate", "match": "m1"}
+#   <- {"t": "state", ...same, "you": null}
+#   -> {"t": "pour", "s": 0, "d": 2}
+#   <- {"t": "d", "p": 0, "s": 0, "d": 2, "n": 1, "m": 1}     (to every client in the match)
+#   <- {"t": "x", "s": 0, "d": 2}                              (rejected, sender only)
+#   <- {"t": "win", "p": 0, "m": 7, "rank": 1}                 (to every client in the match)
+#   <- {"t": "join", "p": 1, "name": "bob"}                    (another racer joined)
+#
+# Deltas carry just the move and the mover's move count; clients replay pours locally with
+# the same engine rules, so the board never has to be resent.
+import sys
+import json
+import time
+import random
+import asyncio
+import multiprocessing
+
+from levels import LEVELS
+from engine import Board
+from solver import solve
+
+HOST = "127.0.0.1"
+PORT = 8765
+WRITE_HIGH_WATER = 64 * 1024
+LINE_LIMIT = 64 * 1024  # longest accepted message line
+SELFPLAY_INTERVAL = 0.25  # seconds between a bot's moves, roughly a quick human
+
+LEVELS_BY_ID = {lv["id"]: lv for lv in LEVELS}
+
+
+def encode(msg):
+    return (json.dumps(msg, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+# ==================== MATCH ====================
+class Match:
+    def __init__(self, match_id, level):
+        self.match_id = match_id
+        self.level = level
+        self.boards = []        # player id -> Board
+        self.names = []
+        self.finish_order = []
+        self.clients = set()    # writers of players and spectators
+
+    def add_player(self, name):
+        pid = len(self.boards)
+        self.boards.append(Board(self.level["tubes"], self.level.get("unlock_after_moves")))
+        self.names.append(name)
+        return pid
+
+    def state_message(self, pid):
+        return {
+            "t": "state",
+            "match": self.match_id,
+            "level": self.level["id"],
+            "you": pid,
+            "tubes": self.level["tubes"],
+            "locks": {str(k): v for k, v in self.level.get("unlock_after_moves", {}).items()},
+            "players": {
+                str(p): {"name": self.names[p], "moves": b.moves, "history": [h[:2] for h in b.history]}
+                for p, b in enumerate(self.boards)
+            },
+        }
+
+    def broadcast(self, msg):
+        data = encode(msg)
+        for writer in self.clients:
+            if not writer.is_closing():
+                writer.write(data)
+
+
+# ==================== SERVER ====================
+class RaceServer:
+    def __init__(self):
+        self.matches = {}
+        # pour requests timed from the received line to the queued replies
+        # (JSON decode, rules, encode + broadcast); event-loop wait is not included
+        self.moves_handled = 0
+        self.move_time_total = 0.0
+        self.move_time_max = 0.0
+
+    def get_match(self, match_id, level_id):
+        match = self.matches.get(match_id)
+        if match is None:
+            level = LEVELS_BY_ID.get(level_id) if isinstance(level_id, str) else None
+            if level is None:
+                return None
+            match = Match(match_id, level)
+            self.matches[match_id] = match
+        return match
+
+    def record_move_time(self, elapsed):
+        self.moves_handled += 1
+        self.move_time_total += elapsed
+        if elapsed > self.move_time_max:
+            self.move_time_max = elapsed
+
+    def handle_pour(self, match, pid, writer, src, dst):
+        board = match.boards[pid]
+        moved = board.try_pour(src, dst)
+        if moved:
+            match.broadcast({"t": "d", "p": pid, "s": src, "d": dst, "n": moved, "m": board.moves})
+            if board.won:
+                match.finish_order.append(pid)
+                match.broadcast({"t": "win", "p": pid, "m": board.moves, "rank": len(match.finish_order)})
+        else:
+            writer.write(encode({"t": "x", "s": src, "d": dst}))
+
+    async def handle_client(self, reader, writer):
+        match = None
+        pid = None
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, asyncio.LimitOverrunError):
+                    # over-long line: the reader has already discarded it
+                    writer.write(encode({"t": "error", "reason": "message too long"}))
+                    continue
+                if not line:
+                    break
+                started = time.perf_counter()
+                try:
+                    msg = json.loads(line)
+                    kind = msg["t"]
+                except Exception:
+                    writer.write(encode({"t": "error", "reason": "bad message"}))
+                    continue
+
+                if kind == "pour":
+                    if match is None or pid is None:
+                        writer.write(encode({"t": "error", "reason": "not a player"}))
+                        continue
+                    try:
+                        src, dst = int(msg["s"]), int(msg["d"])
+                    except Exception:
+                        writer.write(encode({"t": "error", "reason": "bad move"}))
+                        continue
+                    self.handle_pour(match, pid, writer, src, dst)
+                    self.record_move_time(time.perf_counter() - started)
+                elif kind in ("join", "spectate"):
+                    if match is not None:
+                        writer.write(encode({"t": "error", "reason": "already in a match"}))
+                        continue
+                    match_id = msg.get("match", "")
+                    if not isinstance(match_id, str):
+                        writer.write(encode({"t": "error", "reason": "bad match id"}))
+                        continue
+                    match = self.get_match(match_id, msg.get("level", LEVELS[0]["id"]))
+                    if match is None:
+                        writer.write(encode({"t": "error", "reason": "unknown level"}))
+                        continue
+                    if kind == "join":
+                        pid = match.add_player(str(msg.get("name", "player")))
+                        match.broadcast({"t": "join", "p": pid, "name": match.names[pid]})
+                    match.clients.add(writer)
+                    writer.write(encode(match.state_message(pid)))
+                else:
+                    writer.write(encode({"t": "error", "reason": f"unknown message {kind!r}"}))
+
+                if writer.transport.get_write_buffer_size() > WRITE_HIGH_WATER:
+                    await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            if match is not None:
+                match.clients.discard(writer)
+                if not match.clients:
+                    self.matches.pop(match.match_id, None)
+            writer.close()
+
+    def mean_move_us(self):
+        if not self.moves_handled:
+            return 0.0
+        return self.move_time_total / self.moves_handled * 1e6
+
+
+async def serve(host=HOST, port=PORT):
+    race = RaceServer()
+    server = await asyncio.start_server(race.handle_client, host, port, limit=LINE_LIMIT)
+    return race, server
+
+
+# ==================== BOT ====================
+async def run_bot(host, port, match_id, level_id, name="bot", latencies=None, path=None,
+                  interval=0.0, start_delay=0.0):
+    """Join a match and play `path` (the optimal solution by default), one pour at a time.
+
+    Each pour waits for its own delta before sending the next, so `latencies` (if given)
+    collects true round-trip times in seconds. `interval` paces the moves like a player
+    thinking between pours. Returns the final move count.
+    """
+    await asyncio.sleep(start_delay)
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(encode({"t": "join", "match": match_id, "level": level_id, "name": name}))
+    await writer.drain()
+
+    state = None
+    while state is None:
+        msg = json.loads(await reader.readline())
+        if msg["t"] == "state":
+            state = msg
+    you = state["you"]
+    if path is None:
+        path = solve(state["tubes"], state["locks"]) or []
+
+    moves = 0
+    for src, dst in path:
+        if interval:
+            await asyncio.sleep(interval)
+        sent = time.perf_counter()
+        writer.write(encode({"t": "pour", "s": src, "d": dst}))
+        await writer.drain()
+        while True:
+            msg = json.loads(await reader.readline())
+            if msg["t"] == "d" and msg["p"] == you:
+                moves = msg["m"]
+                break
+            if msg["t"] == "x":
+                raise RuntimeError(f"server rejected move {src}->{dst}")
+        if latencies is not None:
+            latencies.append(time.perf_counter() - sent)
+
+    writer.close()
+    await writer.wait_closed()
+    return moves
+
+
+async def _bot_fleet(host, port, num_matches, level_id, path, interval):
+    rng = random.Random(0)
+    latencies = []
+    await asyncio.gather(*(
+        run_bot(host, port, f"m{i}", level_id, name=f"bot{i}", latencies=latencies, path=path,
+                interval=interval, start_delay=rng.uniform(0, interval))
+        for i in range(num_matches)
+    ))
+    return latencies
+
+
+def _bot_fleet_process(host, port, num_matches, level_id, path, interval, conn):
+    conn.send(asyncio.run(_bot_fleet(host, port, num_matches, level_id, path, interval)))
+    conn.close()
+
+
+async def selfplay(num_matches=1000, level_id="demo_01", interval=SELFPLAY_INTERVAL, host=HOST, port=0):
+    """Race one bot per match against a localhost server and report move latency.
+
+    The bots run in a separate process, so the round trips they measure include the
+    server's JSON decode/encode, event-loop scheduling and socket hops, not just the
+    rules. interval=0 floods the server instead of pacing moves like players.
+    """
+    race, server = await serve(host, port)
+    port = server.sockets[0].getsockname()[1]
+
+    # Bots share the solved path so the benchmark measures the server, not the solver
+    level = LEVELS_BY_ID[level_id]
+    path = solve(level["tubes"], level.get("unlock_after_moves"))
+
+    recv_conn, send_conn = multiprocessing.Pipe(duplex=False)
+    bots = multiprocessing.Process(
+        target=_bot_fleet_process,
+        args=(host, port, num_matches, level_id, path, interval, send_conn),
+    )
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+    bots.start()
+    try:
+        latencies = await loop.run_in_executor(None, recv_conn.recv)
+    finally:
+        await loop.run_in_executor(None, bots.join)
+        server.close()
+        await server.wait_closed()
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"matches: {num_matches}  moves: {race.moves_handled}  interval: {interval}s  wall: {wall:.2f}s")
+    print(f"server time per move (decode -> replies queued): "
+          f"mean {race.mean_move_us():.1f}us  max {race.move_time_max * 1e6:.1f}us")
+    if latencies:
+        p50 = latencies[len(latencies) // 2] * 1e3
+        p99 = latencies[int(len(latencies) * 0.99)] * 1e3
+        print(f"client round trip: p50 {p50:.2f}ms  p99 {p99:.2f}ms  max {latencies[-1] * 1e3:.2f}ms")
+
+
+# ==================== CLI ====================
+async def run_forever(host=HOST, port=PORT):
+    _, server = await serve(host, port)
+    print(f"WaterSort+ race server on {host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "selfplay":
+        count = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+        level_id = sys.argv[3] if len(sys.argv) > 3 else "demo_01"
+        interval = float(sys.argv[4]) if len(sys.argv) > 4 else SELFPLAY_INTERVAL
+        asyncio.run(selfplay(count, level_id, interval))
+    else:
+        port = int(sys.argv[1]) if len(sys.argv) > 1 else PORT
+        try:
+            asyncio.run(run_forever(port=port))
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,246 @@
+# Breadth-first search over board states, following the same pour/lock rules as the game.
+# A state is (tubes, clock): tubes frozen as a tuple of tuples and clock the number of
+# successful moves made so far, clamped to the lock horizon (after that nothing is locked).
+from collections import deque
+
+from engine import (
+    TUBE_CAPACITY,
+    check_win,
+    top_color_and_count,
+    normalize_unlocks,
+    lock_horizon,
+    is_locked_at,
+)
+
+DEFAULT_MAX_STATES = 500_000
+
+
+# ==================== STATES ====================
+def freeze(tubes):
+    return tuple(tuple(tube) for tube in tubes)
+
+
+def initial_state(tubes, unlock_after_moves, moves_made=0):
+    return freeze(tubes), min(moves_made, lock_horizon(unlock_after_moves))
+
+
+def legal_moves(state, unlock_after_moves):
+    tubes, clock = state
+    moves = []
+    for src, src_tube in enumerate(tubes):
+        if not src_tube or is_locked_at(unlock_after_moves, src, clock):
+            continue
+        color = src_tube[-1]
+        for dst, dst_tube in enumerate(tubes):
+            if src == dst or is_locked_at(unlock_after_moves, dst, clock):
+                continue
+            if len(dst_tube) >= TUBE_CAPACITY:
+                continue
+            if dst_tube and dst_tube[-1] != color:
+                continue
+            moves.append((src, dst))
+    return moves
+
+
+def apply_move(state, move, horizon):
+    tubes, clock = state
+    src, dst = move
+    _, count = top_color_and_count(tubes[src])
+    n = min(count, TUBE_CAPACITY - len(tubes[dst]))
+    new_tubes = list(tubes)
+    new_tubes[dst] = tubes[dst] + tubes[src][-n:]
+    new_tubes[src] = tubes[src][:-n]
+    return tuple(new_tubes), min(clock + 1, horizon)
+
+
+def is_solved(state):
+    return check_win(state[0])
+
+
+# ==================== SEARCH ====================
+class SolveTask:
+    """Breadth-first search that can be advanced a slice at a time.
+
+    Call run() until `done`; `path` then holds a shortest move list, or None if the
+    position is unsolvable or the state budget ran out (`truncated` tells which). Lets
+    the UI spread a search over several frames instead of blocking one.
+    """
+
+    def __init__(self, tubes, unlock_after_moves=None, moves_made=0, max_states=DEFAULT_MAX_STATES):
+        self.unlocks = normalize_unlocks(unlock_after_moves)
+        self.horizon = lock_horizon(self.unlocks)
+        self.start = initial_state(tubes, self.unlocks, moves_made)
+        self.max_states = max_states
+        self.parents = {self.start: None}
+        self.queue = deque([self.start])
+        self.path = None
+        self.done = False
+        self.truncated = False
+        self.states_seen = 1
+        if is_solved(self.start):
+            self.path = []
+            self.done = True
+
+    def run(self, max_expansions=None):
+        expanded = 0
+        parents = self.parents
+        while self.queue and not self.done:
+            if max_expansions is not None and expanded >= max_expansions:
+                return self.done
+            state = self.queue.popleft()
+            expanded += 1
+            self.states_seen = len(parents)
+            for move in legal_moves(state, self.unlocks):
+                nxt = apply_move(state, move, self.horizon)
+                if nxt in parents:
+                    continue
+                parents[nxt] = (state, move)
+                if is_solved(nxt):
+                    self.path = _backtrack(parents, nxt)
+                    self._finish()
+                    return True
+                if len(parents) >= self.max_states:
+                    self.truncated = True
+                    self._finish()
+                    return True
+                self.queue.append(nxt)
+        self._finish()
+        return True
+
+    def _finish(self):
+        self.done = True
+        self.states_seen = len(self.parents)
+        # drop the search frontier, only the path is worth keeping
+        self.parents = {}
+        self.queue = deque()
+
+
+def solve(tubes, unlock_after_moves=None, moves_made=0, max_states=DEFAULT_MAX_STATES):
+    """Return a shortest list of (src, dst) moves that wins, or None if unsolvable/over budget."""
+    task = SolveTask(tubes, unlock_after_moves, moves_made, max_states)
+    task.run()
+    return task.path
+
+
+def _backtrack(parents, state):
+    path = []
+    while parents[state] is not None:
+        state, move = parents[state]
+        path.append(move)
+    path.reverse()
+    return path
+
+
+class SolutionCache:
+    """Remembers the optimal remaining moves for every state along solved paths.
+
+    Any suffix of a shortest path is itself a shortest path, so one solve answers every
+    position the solution passes through, e.g. after undoing back along it.
+    """
+
+    def __init__(self, unlock_after_moves=None):
+        self.unlocks = normalize_unlocks(unlock_after_moves)
+        self.horizon = lock_horizon(self.unlocks)
+        self.paths = {}
+
+    def state_for(self, tubes, moves_made):
+        return initial_state(tubes, self.unlocks, moves_made)
+
+    def get(self, state):
+        return self.paths.get(state)
+
+    def store(self, state, path):
+        for i, move in enumerate(path):
+            self.paths[state] = path[i:]
+            state = apply_move(state, move, self.horizon)
+        self.paths[state] = []
+
+
+def explore(tubes, unlock_after_moves=None, max_states=DEFAULT_MAX_STATES):
+    """Walk the whole reachable state graph and collect difficulty metrics.
+
+    Winning states are terminal, just like in the game. Returns a dict with the
+    optimal solution length, mean branching factor, dead-end count (states that can
+    no longer reach a win) and the number of distinct optimal move sequences.
+
+    If the graph is bigger than `max_states` the search is cut off and `truncated` is
+    set; solvability, optimal length, dead ends and solution count are then unknown
+    (None), since any state left unvisited could be a shorter win or a way out.
+    """
+    unlocks = normalize_unlocks(unlock_after_moves)
+    horizon = lock_horizon(unlocks)
+    start = initial_state(tubes, unlocks)
+
+    ids = {start: 0}
+    depth = [0]
+    paths = [1]  # number of shortest move sequences reaching each state
+    preds = [[]]
+    wins = []
+    total_branches = 0
+    expanded = 0
+    truncated = False
+
+    queue = deque([0])
+    states = [start]
+    while queue:
+        sid = queue.popleft()
+        state = states[sid]
+        if is_solved(state):
+            wins.append(sid)
+            continue
+        moves = legal_moves(state, unlocks)
+        total_branches += len(moves)
+        expanded += 1
+        for move in moves:
+            nxt = apply_move(state, move, horizon)
+            nid = ids.get(nxt)
+            if nid is None:
+                if len(states) >= max_states:
+                    truncated = True
+                    continue
+                nid = len(states)
+                ids[nxt] = nid
+                states.append(nxt)
+                depth.append(depth[sid] + 1)
+                paths.append(0)
+                preds.append([])
+                queue.append(nid)
+            preds[nid].append(sid)
+            if depth[nid] == depth[sid] + 1:
+                paths[nid] += paths[sid]
+
+    if truncated:
+        return {
+            "solvable": True if wins else None,
+            "optimal_moves": None,
+            "states": len(states),
+            "branching_factor": round(total_branches / expanded, 3) if expanded else 0.0,
+            "dead_ends": None,
+            "optimal_solutions": None,
+            "truncated": True,
+        }
+
+    # Reverse walk from every win marks the states that can still be solved
+    alive = bytearray(len(states))
+    stack = list(wins)
+    for sid in wins:
+        alive[sid] = 1
+    while stack:
+        sid = stack.pop()
+        for pid in preds[sid]:
+            if not alive[pid]:
+                alive[pid] = 1
+                stack.append(pid)
+
+    optimal = min((depth[w] for w in wins), default=None)
+    optimal_solutions = sum(paths[w] for w in wins if depth[w] == optimal) if wins else 0
+
+    return {
+        "solvable": bool(wins),
+        "optimal_moves": optimal,
+        "states": len(states),
+        "branching_factor": round(total_branches / expanded, 3) if expanded else 0.0,
+        "dead_ends": len(states) - sum(alive),
+        "optimal_solutions": optimal_solutions,
+        "truncated": False,
+    }